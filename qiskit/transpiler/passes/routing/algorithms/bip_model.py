@@ -10,7 +10,6 @@
 # copyright notice, and modified files need to carry a notice indicating
 # that they have been altered from the originals.
 """Integer programming model for quantum circuit compilation."""
-import copy
 import logging
 from functools import lru_cache
 from typing import Optional
@@ -30,6 +29,23 @@ from qiskit.utils import optionals as _optionals
 
 logger = logging.getLogger(__name__)
 
+_SWAP_MATRIX = SwapGate().to_matrix()
+
+
+def _matrix_key(matrix):
+    return np.ascontiguousarray(matrix, dtype=complex).tobytes()
+
+
+@lru_cache(maxsize=1024)
+def _synthesis_fidelities(matrix_key):
+    # Fidelities of the best approximations of a 2q unitary with 0, 1, 2 and 3 CXs.
+    # Keyed by the unitary itself so that distinct nodes with the same gate share the
+    # (costly) Weyl decomposition. The cache is bounded since it lives as long as the process
+    # and circuits such as quantum volume have no two equal unitaries.
+    matrix = np.frombuffer(matrix_key, dtype=complex).reshape(4, 4)
+    traces = two_qubit_cnot_decompose.traces(TwoQubitWeylDecomposition(matrix))
+    return tuple(trace_to_fid(np.asarray(traces)).tolist())
+
 
 @_optionals.HAS_DOCPLEX.require_in_instance
 class BIPMappingModel:
@@ -68,9 +84,9 @@ class BIPMappingModel:
         """
 
         self._dag = dag
-        self._coupling = copy.deepcopy(coupling_map)  # reduced coupling map
         try:
-            self._coupling = self._coupling.reduce(qubit_subset)
+            # reduce() returns a new coupling map, so coupling_map itself is never modified
+            self._coupling = coupling_map.reduce(qubit_subset)  # reduced coupling map
         except CouplingError as err:
             raise TranspilerError(
                 "The 'coupling_map' reduced by 'qubit_subset' must be connected."
@@ -90,6 +106,11 @@ class BIPMappingModel:
         self.num_vqubits = len(self._dag.qubits)
         self.num_pqubits = self._coupling.size()
         self._arcs = self._coupling.get_edges()
+        # Sorted, since the coupling graph returns neighbors in arbitrary order and the model
+        # (and so the chosen solution) would depend on it
+        self._neighbors = [
+            tuple(sorted(self._coupling.neighbors(i))) for i in range(self.num_pqubits)
+        ]
 
         if self.num_vqubits != self.num_pqubits:
             raise TranspilerError(
@@ -100,12 +121,27 @@ class BIPMappingModel:
         self._virtual_to_index = {v: i for i, v in self._index_to_virtual.items()}
 
         # Construct internal circuit model
-        # Extract layers with 2-qubit gates
+        # Extract layers with 2-qubit gates. Each node is assigned the length of the longest path
+        # reaching it, which is the index of its layer in dag.layers(), without having to build
+        # a DAGCircuit for every layer.
+        node_layer = {}  # layer index of each op node, keyed by node id
+        layer_ops = []  # 2-qubit ops of each layer
+        for node in dag.topological_op_nodes():
+            pred_layers = [node_layer.get(pred._node_id, -1) for pred in dag.predecessors(node)]
+            if not pred_layers:
+                # Operations without wires (e.g. zero-operand gates) are not in dag.layers()
+                continue
+            k = 1 + max(pred_layers)
+            node_layer[node._node_id] = k
+            if k == len(layer_ops):
+                layer_ops.append([])
+            if len(node.qargs) == 2 and not getattr(node.op, "_directive", False):
+                layer_ops[k].append(node)
         self._to_su4layer = []
         self.su4layers = []
-        for lay in dag.layers():
+        for ops in layer_ops:
             laygates = []
-            for node in lay["graph"].two_qubit_ops():
+            for node in sorted(ops, key=lambda nd: nd._node_id):  # same order as in dag.layers()
                 i1 = self._virtual_to_index[node.qargs[0]]
                 i2 = self._virtual_to_index[node.qargs[1]]
                 laygates.append(((i1, i2), node))
@@ -116,11 +152,21 @@ class BIPMappingModel:
                 self._to_su4layer.append(-1)
         # Add dummy time steps inbetween su4layers. Dummy time steps can only contain SWAPs.
         self.gates = []  # layered 2q-gates with dummy steps
+        self._dummy_runs = []  # (first time-step, number of steps) of each run of dummy steps
         for k, lay in enumerate(self.su4layers):
             self.gates.append(lay)
             if k == len(self.su4layers) - 1:  # do not add dummy steps after the last layer
                 break
+            if dummy_timesteps > 0:
+                self._dummy_runs.append((len(self.gates), dummy_timesteps))
             self.gates.extend([[]] * dummy_timesteps)
+        # Virtual qubits not involved in any gate at each time-step
+        self._q_no_gate = []
+        for lay in self.gates:
+            used_qubits = {q for (pair, _) in lay for q in pair}
+            self._q_no_gate.append(
+                tuple(q for q in range(self.num_vqubits) if q not in used_qubits)
+            )
 
         # Adjust value of num_splits parameter
         if self._num_splits == 0:
@@ -151,24 +197,24 @@ class BIPMappingModel:
                     self.heur_last_layer[i],
                     len(self.heur_gates[i]),
                 )
-            # Compute connectivity within dummy_timesteps steps, and costs
-            self._long_arcs = []
-            self._long_arcs_cost = {}
-            for i in range(self.num_pqubits):
-                for j in range(self.num_pqubits):
-                    distance = self._coupling.distance(i, j)
-                    if i != j and distance <= dummy_timesteps:
-                        self._long_arcs.append([i, j])
-                        self._long_arcs_cost[(i, j)] = distance
-            self._long_coupling_neighbors = [[] for p in range(self.num_pqubits)]
-            for (i, j) in self._long_arcs:
-                self._long_coupling_neighbors[i].append(j)
+            # Compute connectivity within dummy_timesteps steps; distances are the costs
+            self._distance = np.asarray(self._coupling.distance_matrix, dtype=np.int16)
+            is_long_arc = (self._distance > 0) & (self._distance <= dummy_timesteps)
+            self._long_coupling_neighbors = [np.flatnonzero(row).tolist() for row in is_long_arc]
             self.heur_problem = [None] * (self._num_splits - 1)
+            self.heur_w = [None] * (self._num_splits - 1)
+            self.heur_y = [None] * (self._num_splits - 1)
+            self.heur_x = [None] * (self._num_splits - 1)
+            self.heur_z = [None] * (self._num_splits - 1)
 
         self.bprop = None  # Backend properties to compute cx fidelities (set later if necessary)
         self.default_cx_error_rate = (
             None  # Default cx error rate in case backend properties are not available
         )
+        self._cx_fidelities = None  # CX fidelities of self._arcs (set later if necessary)
+        self._cx_fidelity_powers = None  # Their k-th powers for k = 0..3 (set later if necessary)
+        self._swap_costs = None  # Costs of swaps on self._arcs (set later if necessary)
+        self._arc_costs_cache = {}  # Gate error costs on arcs keyed by gate fidelities
 
         logger.info("Num virtual qubits: %d", self.num_vqubits)
         logger.info("Num physical qubits: %d", self.num_pqubits)
@@ -203,10 +249,6 @@ class BIPMappingModel:
         return self._to_su4layer[depth]
 
     # pylint: disable=invalid-name
-    def _is_dummy_step(self, t: int):
-        """Check if the time-step t is a dummy step or not."""
-        return len(self.gates[t]) == 0
-
     @_optionals.HAS_DOCPLEX.require_in_call
     def create_cpx_problem(
         self,
@@ -251,190 +293,223 @@ class BIPMappingModel:
         """
         self.bprop = backend_prop
         self.default_cx_error_rate = default_cx_error_rate
+        self._arc_costs_cache = {}
         if self.bprop is None and self.default_cx_error_rate is None:
             raise TranspilerError("BackendProperties or default_cx_error_rate must be specified")
-        from docplex.mp.model import Model
-
-        mdl = Model()
+        if objective in ("gate_error", "balanced"):
+            self._cx_fidelities = np.array([self._cx_fidelity(i, j) for (i, j) in self._arcs])
+            self._cx_fidelity_powers = np.power.outer(self._cx_fidelities, np.arange(4))
+            # A swap is implemented with 3 CXs; each of the two swap variables pays half of it
+            with np.errstate(divide="ignore"):
+                self._swap_costs = (-3 / 2 * np.log(self._cx_fidelities)).tolist()
+        else:
+            self._cx_fidelities = None
+            self._cx_fidelity_powers = None
+            self._swap_costs = None
+        mdl = self._new_model()
 
         # *** Define main variables ***
         # Add w variables
-        w = {}
-        for t in range(self.depth):
-            for q in range(self.num_vqubits):
-                for j in range(self.num_pqubits):
-                    w[t, q, j] = mdl.binary_var(name=f"w_{t}_{q}_{j}")
+        w = mdl.binary_var_cube(
+            range(self.depth),
+            range(self.num_vqubits),
+            range(self.num_pqubits),
+            name="w",
+        )
         # Add y variables
-        y = {}
-        for t in range(self.depth):
-            for ((p, q), _) in self.gates[t]:
-                for (i, j) in self._arcs:
-                    y[t, p, q, i, j] = mdl.binary_var(name=f"y_{t}_{p}_{q}_{i}_{j}")
+        y = mdl.binary_var_dict(
+            [
+                (t, p, q, i, j)
+                for t in range(self.depth)
+                for ((p, q), _) in self.gates[t]
+                for (i, j) in self._arcs
+            ],
+            name="y",
+        )
         # Add x variables
-        x = {}
-        for t in range(self.depth - 1):
-            for q in range(self.num_vqubits):
-                for i in range(self.num_pqubits):
-                    x[t, q, i, i] = mdl.binary_var(name=f"x_{t}_{q}_{i}_{i}")
-                    for j in self._coupling.neighbors(i):
-                        x[t, q, i, j] = mdl.binary_var(name=f"x_{t}_{q}_{i}_{j}")
+        x = mdl.binary_var_dict(
+            [
+                (t, q, i, j)
+                for t in range(self.depth - 1)
+                for q in range(self.num_vqubits)
+                for i in range(self.num_pqubits)
+                for j in (i, *self._neighbors[i])
+            ],
+            name="x",
+        )
 
         # *** Define main constraints ***
+        constraints = []  # (constraint, name) pairs, added to the model in a single batch
         # Assignment constraints for w variables
         for t in range(self.depth):
             for q in range(self.num_vqubits):
-                mdl.add_constraint(
-                    sum(w[t, q, j] for j in range(self.num_pqubits)) == 1,
-                    ctname=f"assignment_vqubits_{q}_at_{t}",
+                constraints.append(
+                    (
+                        mdl.sum_vars(w[t, q, j] for j in range(self.num_pqubits)) == 1,
+                        f"assignment_vqubits_{q}_at_{t}",
+                    )
                 )
         for t in range(self.depth):
             for j in range(self.num_pqubits):
-                mdl.add_constraint(
-                    sum(w[t, q, j] for q in range(self.num_vqubits)) == 1,
-                    ctname=f"assignment_pqubits_{j}_at_{t}",
+                constraints.append(
+                    (
+                        mdl.sum_vars(w[t, q, j] for q in range(self.num_vqubits)) == 1,
+                        f"assignment_pqubits_{j}_at_{t}",
+                    )
                 )
         # Each gate must be implemented
         for t in range(self.depth):
             for ((p, q), _) in self.gates[t]:
-                mdl.add_constraint(
-                    sum(y[t, p, q, i, j] for (i, j) in self._arcs) == 1,
-                    ctname=f"implement_gate_{p}_{q}_at_{t}",
+                constraints.append(
+                    (
+                        mdl.sum_vars(y[t, p, q, i, j] for (i, j) in self._arcs) == 1,
+                        f"implement_gate_{p}_{q}_at_{t}",
+                    )
                 )
         # Gate can be implemented iff both of its qubits are located at the associated nodes
         for t in range(self.depth - 1):
             for ((p, q), _) in self.gates[t]:
                 for (i, j) in self._arcs:
                     # Apply McCormick to y[t, p, q, i, j] == w[t, p, i] * w[t, q, j]
-                    mdl.add_constraint(
-                        y[t, p, q, i, j] >= w[t, p, i] + w[t, q, j] - 1,
-                        ctname=f"McCormickLB_{p}_{q}_{i}_{j}_at_{t}",
+                    constraints.append(
+                        (
+                            y[t, p, q, i, j] >= w[t, p, i] + w[t, q, j] - 1,
+                            f"McCormickLB_{p}_{q}_{i}_{j}_at_{t}",
+                        )
                     )
                     # Stronger version of McCormick: gate (p,q) is implemented at (i, j)
                     # if i moves to i or j, and j moves to i or j
-                    mdl.add_constraint(
-                        y[t, p, q, i, j] <= x[t, p, i, i] + x[t, p, i, j],
-                        ctname=f"McCormickUB1_{p}_{q}_{i}_{j}_at_{t}",
-                    )
-                    mdl.add_constraint(
-                        y[t, p, q, i, j] <= x[t, q, j, i] + x[t, q, j, j],
-                        ctname=f"McCormickUB2_{p}_{q}_{i}_{j}_at_{t}",
+                    constraints.append(
+                        (
+                            2 * y[t, p, q, i, j]
+                            <= x[t, p, i, i] + x[t, p, i, j] + x[t, q, j, i] + x[t, q, j, j],
+                            f"McCormickUB_{p}_{q}_{i}_{j}_at_{t}",
+                        )
                     )
         # For last time step, use regular McCormick
         for ((p, q), _) in self.gates[self.depth - 1]:
             for (i, j) in self._arcs:
                 # Apply McCormick to y[self.depth - 1, p, q, i, j]
                 # == w[self.depth - 1, p, i] * w[self.depth - 1, q, j]
-                mdl.add_constraint(
-                    y[self.depth - 1, p, q, i, j]
-                    >= w[self.depth - 1, p, i] + w[self.depth - 1, q, j] - 1,
-                    ctname=f"McCormickLB_{p}_{q}_{i}_{j}_at_last",
+                constraints.append(
+                    (
+                        y[self.depth - 1, p, q, i, j]
+                        >= w[self.depth - 1, p, i] + w[self.depth - 1, q, j] - 1,
+                        f"McCormickLB_{p}_{q}_{i}_{j}_at_last",
+                    )
                 )
-                mdl.add_constraint(
-                    y[self.depth - 1, p, q, i, j] <= w[self.depth - 1, p, i],
-                    ctname=f"McCormickUB1_{p}_{q}_{i}_{j}_at_last",
+                constraints.append(
+                    (
+                        y[self.depth - 1, p, q, i, j] <= w[self.depth - 1, p, i],
+                        f"McCormickUB1_{p}_{q}_{i}_{j}_at_last",
+                    )
                 )
-                mdl.add_constraint(
-                    y[self.depth - 1, p, q, i, j] <= w[self.depth - 1, q, j],
-                    ctname=f"McCormickUB2_{p}_{q}_{i}_{j}_at_last",
+                constraints.append(
+                    (
+                        y[self.depth - 1, p, q, i, j] <= w[self.depth - 1, q, j],
+                        f"McCormickUB2_{p}_{q}_{i}_{j}_at_last",
+                    )
                 )
         # Logical qubit flow-out constraints
         for t in range(self.depth - 1):  # Flow out; skip last time step
             for q in range(self.num_vqubits):
                 for i in range(self.num_pqubits):
-                    mdl.add_constraint(
-                        w[t, q, i]
-                        == x[t, q, i, i] + sum(x[t, q, i, j] for j in self._coupling.neighbors(i)),
-                        ctname=f"flow_out_{q}_{i}_at_{t}",
+                    constraints.append(
+                        (
+                            w[t, q, i]
+                            == mdl.sum_vars(x[t, q, i, j] for j in (i, *self._neighbors[i])),
+                            f"flow_out_{q}_{i}_at_{t}",
+                        )
                     )
         # Logical qubit flow-in constraints
         for t in range(1, self.depth):  # Flow in; skip first time step
             for q in range(self.num_vqubits):
                 for i in range(self.num_pqubits):
-                    mdl.add_constraint(
-                        w[t, q, i]
-                        == x[t - 1, q, i, i]
-                        + sum(x[t - 1, q, j, i] for j in self._coupling.neighbors(i)),
-                        ctname=f"flow_in_{q}_{i}_at_{t}",
+                    constraints.append(
+                        (
+                            w[t, q, i]
+                            == mdl.sum_vars(x[t - 1, q, j, i] for j in (i, *self._neighbors[i])),
+                            f"flow_in_{q}_{i}_at_{t}",
+                        )
                     )
         # If a gate is implemented, involved qubits cannot swap with other positions
         for t in range(self.depth - 1):
             for ((p, q), _) in self.gates[t]:
                 for (i, j) in self._arcs:
-                    mdl.add_constraint(
-                        x[t, p, i, j] == x[t, q, j, i], ctname=f"swap_{p}_{q}_{i}_{j}_at_{t}"
+                    constraints.append(
+                        (x[t, p, i, j] == x[t, q, j, i], f"swap_{p}_{q}_{i}_{j}_at_{t}")
                     )
         # Qubit not in gates can flip with their neighbors
         for t in range(self.depth - 1):
-            q_no_gate = list(range(self.num_vqubits))
-            for ((p, q), _) in self.gates[t]:
-                q_no_gate.remove(p)
-                q_no_gate.remove(q)
+            q_no_gate = self._q_no_gate[t]
             for (i, j) in self._arcs:
-                mdl.add_constraint(
-                    sum(x[t, q, i, j] for q in q_no_gate) == sum(x[t, p, j, i] for p in q_no_gate),
-                    ctname=f"swap_no_gate_{i}_{j}_at_{t}",
+                constraints.append(
+                    (
+                        mdl.sum_vars(x[t, q, i, j] for q in q_no_gate)
+                        == mdl.sum_vars(x[t, p, j, i] for p in q_no_gate),
+                        f"swap_no_gate_{i}_{j}_at_{t}",
+                    )
                 )
 
         # *** Define supplemental variables ***
         # Add z variables to count dummy steps (supplemental variables for symmetry breaking)
-        z = {}
-        for t in range(self.depth):
-            if self._is_dummy_step(t):
-                z[t] = mdl.binary_var(name=f"z_{t}")
+        z = mdl.binary_var_dict(
+            [t for (start, count) in self._dummy_runs for t in range(start, start + count)],
+            name="z",
+        )
 
         # *** Define supplemental constraints ***
         # See if a dummy time step is needed
-        for t in range(self.depth):
-            if self._is_dummy_step(t):
+        for (start, count) in self._dummy_runs:
+            for t in range(start, start + count):
                 for q in range(self.num_vqubits):
-                    mdl.add_constraint(
-                        sum(x[t, q, i, j] for (i, j) in self._arcs) <= z[t],
-                        ctname=f"dummy_ts_needed_for_vqubit_{q}_at_{t}",
+                    constraints.append(
+                        (
+                            mdl.sum_vars(x[t, q, i, j] for (i, j) in self._arcs) <= z[t],
+                            f"dummy_ts_needed_for_vqubit_{q}_at_{t}",
+                        )
                     )
-        # Symmetry breaking between dummy time steps
-        for t in range(self.depth - 1):
-            # This is a dummy time step and the next one is dummy too
-            if self._is_dummy_step(t) and self._is_dummy_step(t + 1):
+        # Symmetry breaking between consecutive dummy time steps
+        for (start, count) in self._dummy_runs:
+            for t in range(start, start + count - 1):
                 # We cannot use the next time step unless this one is used too
-                mdl.add_constraint(z[t] >= z[t + 1], ctname=f"dummy_precedence_{t}")
+                constraints.append((z[t] >= z[t + 1], f"dummy_precedence_{t}"))
+        self._add_constraints(mdl, constraints)
 
         # *** Define objective function ***
         if objective == "depth":
-            objexr = sum(z[t] for t in range(self.depth) if self._is_dummy_step(t))
-            for t in range(self.depth - 1):
-                for q in range(self.num_vqubits):
-                    for (i, j) in self._arcs:
-                        objexr += 0.01 * x[t, q, i, j]
+            objexr = mdl.sum_vars(z.values()) + 0.01 * mdl.sum_vars(
+                x[t, q, i, j]
+                for t in range(self.depth - 1)
+                for q in range(self.num_vqubits)
+                for (i, j) in self._arcs
+            )
             mdl.minimize(objexr)
         elif objective in ("gate_error", "balanced"):
             # We add the depth objective with coefficient depth_obj_weight if balanced was selected.
-            objexr = 0
+            objvars, objcoefs = [], []
             for t in range(self.depth - 1):
                 for (p, q), node in self.gates[t]:
-                    for (i, j) in self._arcs:
-                        # We pay the cost for gate implementation.
-                        pbest_fid = -np.log(self._max_expected_fidelity(node, i, j))
-                        objexr += y[t, p, q, i, j] * pbest_fid
-                        # If a gate is mirrored (followed by a swap on the same qubit pair),
-                        # its cost should be replaced with the cost of the combined (mirrored) gate.
-                        pbest_fidm = -np.log(self._max_expected_mirrored_fidelity(node, i, j))
-                        objexr += x[t, q, i, j] * (pbest_fidm - pbest_fid) / 2
+                    # We pay the cost for gate implementation.
+                    objvars.extend(y[t, p, q, i, j] for (i, j) in self._arcs)
+                    objcoefs.extend(self._arc_costs(self._gate_fidelities(node)))
+                    # If a gate is mirrored (followed by a swap on the same qubit pair),
+                    # its cost should be replaced with the cost of the combined (mirrored) gate.
+                    objvars.extend(x[t, q, i, j] for (i, j) in self._arcs)
+                    objcoefs.extend(self._mirror_arc_costs(node))
                 # Cost of swaps on unused qubits
-                for q in range(self.num_vqubits):
-                    used_qubits = {q for (pair, _) in self.gates[t] for q in pair}
-                    if q not in used_qubits:
-                        for i in range(self.num_pqubits):
-                            for j in self._coupling.neighbors(i):
-                                objexr += x[t, q, i, j] * -3 / 2 * np.log(self._cx_fidelity(i, j))
+                for q in self._q_no_gate[t]:
+                    objvars.extend(x[t, q, i, j] for (i, j) in self._arcs)
+                    objcoefs.extend(self._swap_costs)
             # Cost for the last layer (x variables are not defined for depth-1)
             for (p, q), node in self.gates[self.depth - 1]:
-                for (i, j) in self._arcs:
-                    pbest_fid = -np.log(self._max_expected_fidelity(node, i, j))
-                    objexr += y[self.depth - 1, p, q, i, j] * pbest_fid
+                pbest_fid = self._arc_costs(self._gate_fidelities(node))
+                for k, (i, j) in enumerate(self._arcs):
+                    objvars.append(y[self.depth - 1, p, q, i, j])
+                    objcoefs.append(pbest_fid[k])
+            objexr = mdl.scal_prod(objvars, objcoefs)
             if objective == "balanced":
-                objexr += depth_obj_weight * sum(
-                    z[t] for t in range(self.depth) if self._is_dummy_step(t)
-                )
+                objexr += depth_obj_weight * mdl.sum_vars(z.values())
             mdl.minimize(objexr)
         else:
             raise TranspilerError(f"Unknown objective type: {objective}")
@@ -447,58 +522,71 @@ class BIPMappingModel:
         self.problem = mdl
         if user_model_modifier is not None:
             user_model_modifier(self, self.problem)
-        logger.info("BIP problem stats: %s", self.problem.statistics)
+        if logger.isEnabledFor(logging.INFO):
+            # Model.statistics walks the whole model, so only compute it when it is logged
+            logger.info("BIP problem stats: %s", self.problem.statistics)
 
         # Create reduced models for heuristic
         for split in range(self._num_splits - 1):
-            mdl = Model()
+            mdl = self._new_model()
 
             depth = len(self.heur_gates[split])
             # *** Define main variables ***
             # Add w variables
-            w = {}
-            for t in range(depth):
-                for q in range(self.num_vqubits):
-                    for j in range(self.num_pqubits):
-                        w[t, q, j] = mdl.binary_var(name=f"w_{t}_{q}_{j}")
-                        # Add y variables
-            y = {}
-            for t in range(depth):
-                for ((p, q), _) in self.heur_gates[split][t]:
-                    for (i, j) in self._arcs:
-                        y[t, p, q, i, j] = mdl.binary_var(name=f"y_{t}_{p}_{q}_{i}_{j}")
+            w = mdl.binary_var_cube(
+                range(depth),
+                range(self.num_vqubits),
+                range(self.num_pqubits),
+                name="w",
+            )
+            # Add y variables
+            y = mdl.binary_var_dict(
+                [
+                    (t, p, q, i, j)
+                    for t in range(depth)
+                    for ((p, q), _) in self.heur_gates[split][t]
+                    for (i, j) in self._arcs
+                ],
+                name="y",
+            )
             # Add x variables
-            x = {}
+            x_keys = []
             for t in range(depth - 1):
                 for q in range(self.num_vqubits):
                     for i in range(self.num_pqubits):
-                        x[t, q, i, i] = mdl.binary_var(name=f"x_{t}_{q}_{i}_{i}")
+                        x_keys.append((t, q, i, i))
                         if t < self.heur_last_layer[split] - 1:
-                            for j in self._coupling.neighbors(i):
-                                x[t, q, i, j] = mdl.binary_var(name=f"x_{t}_{q}_{i}_{j}")
+                            x_keys.extend((t, q, i, j) for j in self._neighbors[i])
                         else:
-                            for j in self._long_coupling_neighbors[i]:
-                                x[t, q, i, j] = mdl.binary_var(name=f"x_{t}_{q}_{i}_{j}")
+                            x_keys.extend((t, q, i, j) for j in self._long_coupling_neighbors[i])
+            x = mdl.binary_var_dict(x_keys, name="x")
             # *** Define main constraints ***
+            constraints = []
             # Assignment constraints for w variables
             for t in range(depth):
                 for q in range(self.num_vqubits):
-                    mdl.add_constraint(
-                        sum(w[t, q, j] for j in range(self.num_pqubits)) == 1,
-                        ctname=f"assignment_vqubits_{q}_at_{t}",
+                    constraints.append(
+                        (
+                            mdl.sum_vars(w[t, q, j] for j in range(self.num_pqubits)) == 1,
+                            f"assignment_vqubits_{q}_at_{t}",
+                        )
                     )
             for t in range(depth):
                 for j in range(self.num_pqubits):
-                    mdl.add_constraint(
-                        sum(w[t, q, j] for q in range(self.num_vqubits)) == 1,
-                        ctname=f"assignment_pqubits_{j}_at_{t}",
+                    constraints.append(
+                        (
+                            mdl.sum_vars(w[t, q, j] for q in range(self.num_vqubits)) == 1,
+                            f"assignment_pqubits_{j}_at_{t}",
+                        )
                     )
             # Each gate must be implemented
             for t in range(depth):
                 for ((p, q), _) in self.heur_gates[split][t]:
-                    mdl.add_constraint(
-                        sum(y[t, p, q, i, j] for (i, j) in self._arcs) == 1,
-                        ctname=f"implement_gate_{p}_{q}_at_{t}",
+                    constraints.append(
+                        (
+                            mdl.sum_vars(y[t, p, q, i, j] for (i, j) in self._arcs) == 1,
+                            f"implement_gate_{p}_{q}_at_{t}",
+                        )
                     )
             # Gate can be implemented iff both of its qubits are located at the associated nodes
             for t in range(depth):
@@ -506,201 +594,252 @@ class BIPMappingModel:
                     # Apply McCormick to y[t, p, q, i, j] == w[t, p, i] * w[t, q, j]
                     # == w[depth - 1, p, i] * w[depth - 1, q, j]
                     for (i, j) in self._arcs:
-                        mdl.add_constraint(
-                            y[t, p, q, i, j] >= w[t, p, i] + w[t, q, j] - 1,
-                            ctname=f"McCormickLB_{p}_{q}_{i}_{j}_at_{t}",
+                        constraints.append(
+                            (
+                                y[t, p, q, i, j] >= w[t, p, i] + w[t, q, j] - 1,
+                                f"McCormickLB_{p}_{q}_{i}_{j}_at_{t}",
+                            )
                         )
                         if t < self.heur_last_layer[split] - 1:
                             # Stronger version of McCormick: gate (p,q) is implemented at (i, j)
                             # if i moves to i or j, and j moves to i or j
-                            mdl.add_constraint(
-                                y[t, p, q, i, j] <= x[t, p, i, i] + x[t, p, i, j],
-                                ctname=f"McCormickUB1_{p}_{q}_{i}_{j}_at_{t}",
-                            )
-                            mdl.add_constraint(
-                                y[t, p, q, i, j] <= x[t, q, j, i] + x[t, q, j, j],
-                                ctname=f"McCormickUB2_{p}_{q}_{i}_{j}_at_{t}",
+                            constraints.append(
+                                (
+                                    2 * y[t, p, q, i, j]
+                                    <= x[t, p, i, i]
+                                    + x[t, p, i, j]
+                                    + x[t, q, j, i]
+                                    + x[t, q, j, j],
+                                    f"McCormickUB_{p}_{q}_{i}_{j}_at_{t}",
+                                )
                             )
                         else:
-                            mdl.add_constraint(
-                                y[t, p, q, i, j] <= w[t, p, i],
-                                ctname=f"McCormickUB1_{p}_{q}_{i}_{j}_at_{t}",
+                            constraints.append(
+                                (
+                                    y[t, p, q, i, j] <= w[t, p, i],
+                                    f"McCormickUB1_{p}_{q}_{i}_{j}_at_{t}",
+                                )
                             )
-                            mdl.add_constraint(
-                                y[t, p, q, i, j] <= w[t, q, j],
-                                ctname=f"McCormickUB2_{p}_{q}_{i}_{j}_at_{t}",
+                            constraints.append(
+                                (
+                                    y[t, p, q, i, j] <= w[t, q, j],
+                                    f"McCormickUB2_{p}_{q}_{i}_{j}_at_{t}",
+                                )
                             )
             # Logical qubit flow-out constraints
             for t in range(depth - 1):  # Flow out; skip last time step
                 for q in range(self.num_vqubits):
                     for i in range(self.num_pqubits):
                         if t < self.heur_last_layer[split] - 1:
-                            mdl.add_constraint(
-                                w[t, q, i]
-                                == x[t, q, i, i]
-                                + sum(x[t, q, i, j] for j in self._coupling.neighbors(i)),
-                                ctname=f"flow_out_{q}_{i}_at_{t}",
+                            constraints.append(
+                                (
+                                    w[t, q, i]
+                                    == mdl.sum_vars(
+                                        x[t, q, i, j] for j in (i, *self._neighbors[i])
+                                    ),
+                                    f"flow_out_{q}_{i}_at_{t}",
+                                )
                             )
                         else:
-                            mdl.add_constraint(
-                                w[t, q, i]
-                                == x[t, q, i, i]
-                                + sum(x[t, q, i, j] for j in self._long_coupling_neighbors[i]),
-                                ctname=f"flow_out_{q}_{i}_at_{t}",
+                            constraints.append(
+                                (
+                                    w[t, q, i]
+                                    == mdl.sum_vars(
+                                        x[t, q, i, j]
+                                        for j in (i, *self._long_coupling_neighbors[i])
+                                    ),
+                                    f"flow_out_{q}_{i}_at_{t}",
+                                )
                             )
             # Logical qubit flow-in constraints
             for t in range(1, depth):  # Flow in; skip first time step
                 for q in range(self.num_vqubits):
                     for i in range(self.num_pqubits):
                         if t < self.heur_last_layer[split]:
-                            mdl.add_constraint(
-                                w[t, q, i]
-                                == x[t - 1, q, i, i]
-                                + sum(x[t - 1, q, j, i] for j in self._coupling.neighbors(i)),
-                                ctname=f"flow_in_{q}_{i}_at_{t}",
+                            constraints.append(
+                                (
+                                    w[t, q, i]
+                                    == mdl.sum_vars(
+                                        x[t - 1, q, j, i] for j in (i, *self._neighbors[i])
+                                    ),
+                                    f"flow_in_{q}_{i}_at_{t}",
+                                )
                             )
                         else:
-                            mdl.add_constraint(
-                                w[t, q, i]
-                                == x[t - 1, q, i, i]
-                                + sum(x[t - 1, q, j, i] for j in self._long_coupling_neighbors[i]),
-                                ctname=f"flow_in_{q}_{i}_at_{t}",
+                            constraints.append(
+                                (
+                                    w[t, q, i]
+                                    == mdl.sum_vars(
+                                        x[t - 1, q, j, i]
+                                        for j in (i, *self._long_coupling_neighbors[i])
+                                    ),
+                                    f"flow_in_{q}_{i}_at_{t}",
+                                )
                             )
             # If a gate is implemented, involved qubits cannot swap with other positions; only do this
             # for exact connectivity model
             for t in range(self.heur_last_layer[split] - 1):
                 for ((p, q), _) in self.heur_gates[split][t]:
                     for (i, j) in self._arcs:
-                        mdl.add_constraint(
-                            x[t, p, i, j] == x[t, q, j, i], ctname=f"swap_{p}_{q}_{i}_{j}_at_{t}"
+                        constraints.append(
+                            (x[t, p, i, j] == x[t, q, j, i], f"swap_{p}_{q}_{i}_{j}_at_{t}")
                         )
             # Qubit not in gates can flip with their neighbors; only do this for exact connectivity model
             for t in range(self.heur_last_layer[split] - 1):
-                q_no_gate = list(range(self.num_vqubits))
-                for ((p, q), _) in self.heur_gates[split][t]:
-                    q_no_gate.remove(p)
-                    q_no_gate.remove(q)
+                # Time-steps up to heur_last_layer coincide with those of the full model
+                q_no_gate = self._q_no_gate[t]
                 for (i, j) in self._arcs:
-                    mdl.add_constraint(
-                        sum(x[t, q, i, j] for q in q_no_gate)
-                        == sum(x[t, p, j, i] for p in q_no_gate),
-                        ctname=f"swap_no_gate_{i}_{j}_at_{t}",
+                    constraints.append(
+                        (
+                            mdl.sum_vars(x[t, q, i, j] for q in q_no_gate)
+                            == mdl.sum_vars(x[t, p, j, i] for p in q_no_gate),
+                            f"swap_no_gate_{i}_{j}_at_{t}",
+                        )
                     )
 
             # *** Define supplemental variables ***
             # Add z variables to count dummy steps (supplemental variables for symmetry breaking)
-            z = {}
-            for t in range(self.heur_last_layer[split]):
-                if self._is_dummy_step(t):
-                    z[t] = mdl.binary_var(name=f"z_{t}")
+            # There are no dummy time steps after self.heur_last_layer[split], and runs of
+            # dummy time steps before it coincide with those of the full model.
+            dummy_runs = [run for run in self._dummy_runs if run[0] < self.heur_last_layer[split]]
+            z = mdl.binary_var_dict(
+                [t for (start, count) in dummy_runs for t in range(start, start + count)],
+                name="z",
+            )
 
             # *** Define supplemental constraints ***
-            # See if a dummy time step is needed. There are no dummy time steps
-            # after self.heur_last_layer[split].
-            for t in range(self.heur_last_layer[split]):
-                if self._is_dummy_step(t):
+            # See if a dummy time step is needed
+            for (start, count) in dummy_runs:
+                for t in range(start, start + count):
                     for q in range(self.num_vqubits):
-                        mdl.add_constraint(
-                            sum(x[t, q, i, j] for (i, j) in self._arcs) <= z[t],
-                            ctname=f"dummy_ts_needed_for_vqubit_{q}_at_{t}",
+                        constraints.append(
+                            (
+                                mdl.sum_vars(x[t, q, i, j] for (i, j) in self._arcs) <= z[t],
+                                f"dummy_ts_needed_for_vqubit_{q}_at_{t}",
+                            )
                         )
-            # Symmetry breaking between dummy time steps
-            for t in range(self.heur_last_layer[split] - 1):
-                # This is a dummy time step and the next one is dummy too
-                if self._is_dummy_step(t) and self._is_dummy_step(t + 1):
+            # Symmetry breaking between consecutive dummy time steps
+            for (start, count) in dummy_runs:
+                for t in range(start, start + count - 1):
                     # We cannot use the next time step unless this one is used too
-                    mdl.add_constraint(z[t] >= z[t + 1], ctname=f"dummy_precedence_{t}")
+                    constraints.append((z[t] >= z[t + 1], f"dummy_precedence_{t}"))
+            self._add_constraints(mdl, constraints)
 
             # *** Define objective function ***
             if objective == "depth":
-                objexr = sum(
-                    z[t] for t in range(self.heur_last_layer[split]) if self._is_dummy_step(t)
+                objexr = mdl.sum_vars(z.values()) + 0.01 * mdl.sum_vars(
+                    x[t, q, i, j]
+                    for t in range(self.heur_last_layer[split] - 1)
+                    for q in range(self.num_vqubits)
+                    for (i, j) in self._arcs
                 )
-                for t in range(self.heur_last_layer[split] - 1):
-                    for q in range(self.num_vqubits):
-                        for (i, j) in self._arcs:
-                            objexr += 0.01 * x[t, q, i, j]
-                            mdl.minimize(objexr)
+                mdl.minimize(objexr)
             elif objective in ("gate_error", "balanced"):
                 # We add the depth objective with coefficient depth_obj_weight if balanced was selected.
-                objexr = 0
+                # Approximate cost of a swap along each long arc, based on its distance
+                long_swap_cost = -3 / 2 * np.log(self._avg_cx_fidelity())
+                long_swap_costs = [
+                    (long_swap_cost * self._distance[i, neighbors]).tolist()
+                    for i, neighbors in enumerate(self._long_coupling_neighbors)
+                ]
+                objvars, objcoefs = [], []
                 for t in range(depth - 1):
                     if t < self.heur_last_layer[split]:
                         # "Exact" cost function for regular arcs
                         for (p, q), node in self.heur_gates[split][t]:
-                            for (i, j) in self._arcs:
-                                # We pay the cost for gate implementation.
-                                pbest_fid = -np.log(self._max_expected_fidelity(node, i, j))
-                                objexr += y[t, p, q, i, j] * pbest_fid
-                                # If a gate is mirrored (followed by a swap on the same qubit pair),
-                                # its cost should be replaced with the cost of the combined (mirrored)
-                                # gate.
-                                pbest_fidm = -np.log(
-                                    self._max_expected_mirrored_fidelity(node, i, j)
-                                )
-                                objexr += x[t, q, i, j] * (pbest_fidm - pbest_fid) / 2
+                            # We pay the cost for gate implementation.
+                            objvars.extend(y[t, p, q, i, j] for (i, j) in self._arcs)
+                            objcoefs.extend(self._arc_costs(self._gate_fidelities(node)))
+                            # If a gate is mirrored (followed by a swap on the same qubit pair),
+                            # its cost should be replaced with the cost of the combined (mirrored)
+                            # gate.
+                            objvars.extend(x[t, q, i, j] for (i, j) in self._arcs)
+                            objcoefs.extend(self._mirror_arc_costs(node))
                         # Cost of swaps on unused qubits
-                        for q in range(self.num_vqubits):
-                            used_qubits = {
-                                q for (pair, _) in self.heur_gates[split][t] for q in pair
-                            }
-                            if q not in used_qubits:
-                                for i in range(self.num_pqubits):
-                                    for j in self._coupling.neighbors(i):
-                                        objexr += (
-                                            x[t, q, i, j] * -3 / 2 * np.log(self._cx_fidelity(i, j))
-                                        )
+                        for q in self._q_no_gate[t]:
+                            objvars.extend(x[t, q, i, j] for (i, j) in self._arcs)
+                            objcoefs.extend(self._swap_costs)
                     else:
                         # We use long arcs here, so we only approximate the objective function
                         for (p, q), node in self.heur_gates[split][t]:
-                            for (i, j) in self._arcs:
-                                # We pay the cost for gate implementation.
-                                pbest_fid = -np.log(self._max_expected_fidelity(node, i, j))
-                                objexr += y[t, p, q, i, j] * pbest_fid
+                            # We pay the cost for gate implementation.
+                            pbest_fid = self._arc_costs(self._gate_fidelities(node))
+                            for k, (i, j) in enumerate(self._arcs):
+                                objvars.append(y[t, p, q, i, j])
+                                objcoefs.append(pbest_fid[k])
                         # Approximate cost of swaps based on distance
                         for q in range(self.num_vqubits):
                             for i in range(self.num_pqubits):
-                                for j in self._long_coupling_neighbors[i]:
-                                    objexr += (
-                                        x[t, q, i, j]
-                                        * -3
-                                        / 2
-                                        * np.log(self._avg_cx_fidelity())
-                                        * self._long_arcs_cost[(i, j)]
-                                    )
+                                objvars.extend(
+                                    x[t, q, i, j] for j in self._long_coupling_neighbors[i]
+                                )
+                                objcoefs.extend(long_swap_costs[i])
                 # Cost for the last layer (x variables are not defined for depth-1)
                 for (p, q), node in self.heur_gates[split][depth - 1]:
-                    for (i, j) in self._arcs:
-                        pbest_fid = -np.log(self._max_expected_fidelity(node, i, j))
-                        objexr += y[depth - 1, p, q, i, j] * pbest_fid
+                    pbest_fid = self._arc_costs(self._gate_fidelities(node))
+                    for k, (i, j) in enumerate(self._arcs):
+                        objvars.append(y[depth - 1, p, q, i, j])
+                        objcoefs.append(pbest_fid[k])
+                objexr = mdl.scal_prod(objvars, objcoefs)
                 if objective == "balanced":
-                    objexr += depth_obj_weight * sum(
-                        z[t] for t in range(self.heur_last_layer[split]) if self._is_dummy_step(t)
-                    )
-                    mdl.minimize(objexr)
+                    objexr += depth_obj_weight * mdl.sum_vars(z.values())
+                mdl.minimize(objexr)
             else:
                 raise TranspilerError(f"Unknown objective type: {objective}")
 
             # Store for future reference (e.g., user constraints)
+            self.heur_w[split] = w
+            self.heur_y[split] = y
+            self.heur_x[split] = x
+            self.heur_z[split] = z
             self.heur_problem[split] = mdl
             if user_model_modifier is not None:
                 user_model_modifier(self, self.heur_problem[split])
-            logger.info(
-                "BIP heuristic problem %d stats: %s", split, self.heur_problem[split].statistics
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "BIP heuristic problem %d stats: %s", split, self.heur_problem[split].statistics
+                )
         # -- closes "for split in range(self._num_splits)" loop
 
-    def _max_expected_fidelity(self, node, i, j):
-        return max(
-            gfid * self._cx_fidelity(i, j) ** k
-            for k, gfid in enumerate(self._gate_fidelities(node))
-        )
+    @staticmethod
+    def _new_model():
+        from docplex.mp.model import Model
 
-    def _max_expected_mirrored_fidelity(self, node, i, j):
-        return max(
-            gfid * self._cx_fidelity(i, j) ** k
-            for k, gfid in enumerate(self._mirrored_gate_fidelities(node))
-        )
+        mdl = Model()
+        # CPLEX parameters that do not depend on solve_cpx_problem arguments are set at
+        # creation, so that a user_model_modifier can see and override them
+        mdl.context.cplex_parameters.randomseed = 777
+        return mdl
+
+    @staticmethod
+    def _add_constraints(mdl, constraints):
+        # Adding constraints in one batch avoids the overhead of mdl.add_constraint per row.
+        # Constraint names are always attached so that a user_model_modifier can look
+        # constraints up with mdl.get_constraint_by_name.
+        cts = [ct for (ct, _) in constraints]
+        names = [name for (_, name) in constraints]
+        mdl.add_constraints_(cts, names)
+
+    def _arc_costs(self, gate_fidelities):
+        # Negative log of the max expected fidelity of a gate on each arc in self._arcs,
+        # where gate_fidelities[k] is the fidelity of the gate synthesized with k CXs.
+        # Gates sharing the same fidelities (e.g. repeated SU4s) share the result.
+        if gate_fidelities not in self._arc_costs_cache:
+            expected_fidelities = np.asarray(gate_fidelities) * self._cx_fidelity_powers
+            self._arc_costs_cache[gate_fidelities] = (
+                -np.log(expected_fidelities.max(axis=1))
+            ).tolist()
+        return self._arc_costs_cache[gate_fidelities]
+
+    def _mirror_arc_costs(self, node):
+        # Change in the cost of a gate on each arc if it is mirrored (followed by a swap on the
+        # same qubit pair), split equally between the two swap variables of the arc.
+        key = (self._gate_fidelities(node), self._mirrored_gate_fidelities(node))
+        if key not in self._arc_costs_cache:
+            cost = np.asarray(self._arc_costs(key[0]))
+            mirrored_cost = np.asarray(self._arc_costs(key[1]))
+            self._arc_costs_cache[key] = ((mirrored_cost - cost) / 2).tolist()
+        return self._arc_costs_cache[key]
 
     def _cx_fidelity(self, i, j) -> float:
         # fidelity of cx on global physical qubits
@@ -710,35 +849,27 @@ class BIPMappingModel:
             return 1.0 - self.default_cx_error_rate
 
     def _avg_cx_fidelity(self) -> float:
-        # average fidelity of cx on global physical qubits
+        # average fidelity of cx on global physical qubits (geometric mean of the error rates)
         if self.bprop is not None:
-            return 1.0 - np.exp(
-                np.mean(
-                    np.log(
-                        self.bprop.gate_error("cx", [self.global_qubit[i], self.global_qubit[j]])
-                        for (i, j) in self._arcs
-                    )
-                )
+            cx_errors = np.fromiter(
+                (
+                    self.bprop.gate_error("cx", [self.global_qubit[i], self.global_qubit[j]])
+                    for (i, j) in self._arcs
+                ),
+                dtype=float,
+                count=len(self._arcs),
             )
+            return 1.0 - np.exp(np.mean(np.log(cx_errors)))
         else:
             return 1.0 - self.default_cx_error_rate
 
     @staticmethod
-    @lru_cache()
     def _gate_fidelities(node):
-        matrix = node.op.to_matrix()
-        target = TwoQubitWeylDecomposition(matrix)
-        traces = two_qubit_cnot_decompose.traces(target)
-        return [trace_to_fid(traces[i]) for i in range(4)]
+        return _synthesis_fidelities(_matrix_key(node.op.to_matrix()))
 
     @staticmethod
-    @lru_cache()
     def _mirrored_gate_fidelities(node):
-        matrix = node.op.to_matrix()
-        swap = SwapGate().to_matrix()
-        targetm = TwoQubitWeylDecomposition(matrix @ swap)
-        tracesm = two_qubit_cnot_decompose.traces(targetm)
-        return [trace_to_fid(tracesm[i]) for i in range(4)]
+        return _synthesis_fidelities(_matrix_key(node.op.to_matrix() @ _SWAP_MATRIX))
 
     @_optionals.HAS_CPLEX.require_in_call
     def solve_cpx_problem(self, time_limit: float = 60, threads: int = None) -> str:
@@ -757,70 +888,87 @@ class BIPMappingModel:
         Raises:
             MissingOptionalLibraryError: If CPLEX is not installed
         """
+        # Because the first problem is the harder, we compute
+        # the time limits with the following formula: the
+        # *last* problem solved gets 1 unit of time, the one
+        # before gets 2 units of time, the one before 3 units,
+        # and so on. This yields the expression below.
+        time_limits = (
+            time_limit
+            * (self._num_splits - np.arange(self._num_splits))
+            / (self._num_splits * (self._num_splits + 1) / 2)
+        )
         if self._num_splits > 1:
+            from docplex.mp.constants import EffortLevel
+            from docplex.mp.solution import SolveSolution
+
             for split in range(self._num_splits - 1):
-                # Because the first problem is the harder, we compute
-                # the time limit with the following formula: the
-                # *last* problem solved gets 1 unit of time, the one
-                # before gets 2 units of time, the one before 3 units,
-                # and so on. This yields the expression below.
-                time = (
-                    time_limit
-                    * (self._num_splits - split)
-                    / (self._num_splits * (self._num_splits + 1) / 2)
-                )
-                self.heur_problem[split].set_time_limit(time)
+                self.heur_problem[split].set_time_limit(time_limits[split])
                 if threads is not None:
                     self.heur_problem[split].context.cplex_parameters.threads = threads
-                self.heur_problem[split].context.cplex_parameters.randomseed = 777
 
-                self.heur_problem[split].solve()
+                solution = self.heur_problem[split].solve()
                 status = self.heur_problem[split].solve_details.status
                 logger.info("BIP heur solution status: %s", status)
-                # Fix all variables up to layer self.heur_last_layer[split]
+                if solution is None:
+                    # There is nothing to build the next problem on
+                    return status
+                # Time left unused by an easy problem is shared among the remaining ones
+                unused_time = time_limits[split] - self.heur_problem[split].solve_details.time
+                if unused_time > 0:
+                    time_limits[split + 1 :] += unused_time / (self._num_splits - split - 1)
+                w, y, x, z = (
+                    self.heur_w[split],
+                    self.heur_y[split],
+                    self.heur_x[split],
+                    self.heur_z[split],
+                )
                 if split < self._num_splits - 2:
-                    next_problem = self.heur_problem[split + 1]
+                    next_w, next_y, next_x, next_z = (
+                        self.heur_w[split + 1],
+                        self.heur_y[split + 1],
+                        self.heur_x[split + 1],
+                        self.heur_z[split + 1],
+                    )
+                    next_problem, next_gates = (
+                        self.heur_problem[split + 1],
+                        self.heur_gates[split + 1],
+                    )
                 else:
-                    next_problem = self.problem
-                for t in range(self.heur_last_layer[split]):
-                    for q in range(self.num_vqubits):
-                        for j in range(self.num_pqubits):
-                            val = (
-                                self.heur_problem[split]
-                                .get_var_by_name(f"w_{t}_{q}_{j}")
-                                .solution_value
-                            )
-                            next_problem.get_var_by_name(f"w_{t}_{q}_{j}").lb = val
-                            next_problem.get_var_by_name(f"w_{t}_{q}_{j}").ub = val
-                    for ((p, q), _) in self.heur_gates[split][t]:
-                        for (i, j) in self._arcs:
-                            val = (
-                                self.heur_problem[split]
-                                .get_var_by_name(f"y_{t}_{p}_{q}_{i}_{j}")
-                                .solution_value
-                            )
-                            next_problem.get_var_by_name(f"y_{t}_{p}_{q}_{i}_{j}").lb = val
-                            next_problem.get_var_by_name(f"y_{t}_{p}_{q}_{i}_{j}").ub = val
-                    if t < self.heur_last_layer[split] - 1:
-                        for q in range(self.num_vqubits):
-                            for i in range(self.num_pqubits):
-                                for j in list(self._coupling.neighbors(i)) + [i]:
-                                    val = (
-                                        self.heur_problem[split]
-                                        .get_var_by_name(f"x_{t}_{q}_{i}_{j}")
-                                        .solution_value
-                                    )
-                                    next_problem.get_var_by_name(f"x_{t}_{q}_{i}_{j}").lb = val
-                                    next_problem.get_var_by_name(f"x_{t}_{q}_{i}_{j}").ub = val
-                    if self._is_dummy_step(t):
-                        val = self.heur_problem[split].get_var_by_name(f"z_{t}").solution_value
-                        next_problem.get_var_by_name(f"z_{t}").lb = val
-                        next_problem.get_var_by_name(f"z_{t}").ub = val
-
-        self.problem.set_time_limit(time_limit / (self._num_splits * (self._num_splits + 1) / 2))
+                    next_w, next_y, next_x, next_z = self.w, self.y, self.x, self.z
+                    next_problem, next_gates = self.problem, self.gates
+                # Fix all variables up to layer self.heur_last_layer[split] in the next problem
+                # (time-steps before it coincide, and x uses regular arcs up to the step before)
+                last_layer = self.heur_last_layer[split]
+                fixed = [(var, next_w[key]) for key, var in w.items() if key[0] < last_layer]
+                fixed += [(var, next_y[key]) for key, var in y.items() if key[0] < last_layer]
+                fixed += [(var, next_x[key]) for key, var in x.items() if key[0] < last_layer - 1]
+                # z is only defined on the dummy steps before self.heur_last_layer[split]
+                fixed += [(var, next_z[key]) for key, var in z.items()]
+                values = solution.get_values([var for (var, _) in fixed])
+                next_vars = [next_var for (_, next_var) in fixed]
+                next_problem.change_var_lower_bounds(next_vars, values)
+                next_problem.change_var_upper_bounds(next_vars, values)
+                # Warm start the next problem with the layouts found for the remaining SU4 layers.
+                # They were reached through long arcs, so CPLEX may need to repair the start.
+                su4_steps = [t for t, lay in enumerate(self.heur_gates[split]) if lay]
+                next_su4_steps = [t for t, lay in enumerate(next_gates) if lay]
+                start = [
+                    (w[t, q, j], next_w[next_t, q, j])
+                    for t, next_t in zip(su4_steps, next_su4_steps)
+                    if t >= self.heur_last_layer[split]
+                    for q in range(self.num_vqubits)
+                    for j in range(self.num_pqubits)
+                ]
+                values = solution.get_values([var for (var, _) in start])
+                mip_start = SolveSolution(
+                    next_problem, {next_var: val for ((_, next_var), val) in zip(start, values)}
+                )
+                next_problem.add_mip_start(mip_start, effort_level=EffortLevel.Repair)
+
+        self.problem.set_time_limit(time_limits[-1])
         if threads is not None:
             self.problem.context.cplex_parameters.threads = threads
-        self.problem.context.cplex_parameters.randomseed = 777
 
         self.solution = self.problem.solve()
 
@@ -837,11 +985,13 @@ class BIPMappingModel:
         Returns:
             Layout
         """
+        values = self.solution.get_values(
+            [self.w[t, q, i] for q in range(self.num_vqubits) for i in range(self.num_pqubits)]
+        )
+        assigned = np.reshape(values, (self.num_vqubits, self.num_pqubits)) > 0.5
         dic = {}
-        for q in range(self.num_vqubits):
-            for i in range(self.num_pqubits):
-                if self.solution.get_value(f"w_{t}_{q}_{i}") > 0.5:
-                    dic[self._index_to_virtual[q]] = self.global_qubit[i]
+        for (q, i) in np.argwhere(assigned).tolist():
+            dic[self._index_to_virtual[q]] = self.global_qubit[i]
         layout = Layout(dic)
         for reg in self._dag.qregs.values():
             layout.add_register(reg)
@@ -856,11 +1006,13 @@ class BIPMappingModel:
         Returns:
             List of swaps (pairs of physical qubits (integers))
         """
+        arcs = [(i, j) for (i, j) in self._arcs if i < j]
+        values = self.solution.get_values(
+            [self.x[t, q, i, j] for (i, j) in arcs for q in range(self.num_vqubits)]
+        )
+        moved = np.reshape(values, (len(arcs), self.num_vqubits)) > 0.5
         swaps = []
-        for (i, j) in self._arcs:
-            if i >= j:
-                continue
-            for q in range(self.num_vqubits):
-                if self.solution.get_value(f"x_{t}_{q}_{i}_{j}") > 0.5:
-                    swaps.append((self.global_qubit[i], self.global_qubit[j]))
+        for (k, _) in np.argwhere(moved).tolist():
+            i, j = arcs[k]
+            swaps.append((self.global_qubit[i], self.global_qubit[j]))
         return swaps
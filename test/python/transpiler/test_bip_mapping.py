@@ -15,8 +15,9 @@
 import unittest
 
 from qiskit import QuantumRegister, QuantumCircuit, ClassicalRegister
-from qiskit.circuit import Barrier
+from qiskit.circuit import Barrier, Instruction
 from qiskit.circuit.library.standard_gates import SwapGate
+from qiskit.circuit.random import random_circuit
 from qiskit.converters import circuit_to_dag
 from qiskit.test import QiskitTestCase
 from qiskit.providers.fake_provider import FakeLima
@@ -24,6 +25,7 @@ from qiskit.transpiler import CouplingMap, Layout, PassManager
 from qiskit.transpiler.exceptions import TranspilerError
 from qiskit.transpiler.passes import BIPMapping
 from qiskit.transpiler.passes import CheckMap, Collect2qBlocks, ConsolidateBlocks, UnitarySynthesis
+from qiskit.transpiler.passes.routing.algorithms.bip_model import BIPMappingModel
 from qiskit.utils import optionals
 
 
@@ -161,6 +163,43 @@ class TestBIPMapping(QiskitTestCase):
         CheckMap(coupling)(actual, property_set)
         self.assertTrue(property_set["is_swap_mapped"])
 
+    def test_zero_operand_instruction(self):
+        """Can map a circuit containing an instruction without operands."""
+        circuit = QuantumCircuit(3)
+        circuit.cx(0, 1)
+        circuit.append(Instruction("noop", 0, 0, []), [], [])
+        circuit.cx(1, 2)
+        coupling = CouplingMap.from_line(3)
+
+        property_set = {}
+        actual = BIPMapping(coupling)(circuit, property_set)
+
+        CheckMap(coupling)(actual, property_set)
+        self.assertTrue(property_set["is_swap_mapped"])
+
+    def test_su4layers_match_dag_layers(self):
+        """The 2q-gate layers of the model are those of dag.layers()."""
+        coupling = CouplingMap.from_line(5)
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                circuit = random_circuit(5, 4, measure=True, conditional=True, seed=seed)
+                circuit.barrier([0, 1])
+                circuit.compose(
+                    random_circuit(5, 4, conditional=True, seed=seed + 100), inplace=True
+                )
+                dag = circuit_to_dag(circuit)
+                model = BIPMappingModel(dag, coupling, list(range(5)), dummy_timesteps=1)
+                index = {bit: i for i, bit in enumerate(dag.qubits)}
+                for k, layer in enumerate(dag.layers()):
+                    pairs = [
+                        (index[node.qargs[0]], index[node.qargs[1]])
+                        for node in layer["graph"].two_qubit_ops()
+                    ]
+                    self.assertEqual(model.is_su4layer(k), bool(pairs))
+                    if pairs:
+                        su4layer = model.su4layers[model.to_su4layer_depth(k)]
+                        self.assertEqual([pair for (pair, _) in su4layer], pairs)
+
     def test_unmappable_cnots_in_a_layer(self):
         """Test mapping of a circuit with 2 cnots in a layer into T-shape coupling,
         which BIPMapping cannot map."""
@@ -177,6 +216,21 @@ class TestBIPMapping(QiskitTestCase):
         # Fails to map and returns the original circuit
         self.assertEqual(circuit, actual)
 
+    def test_infeasible_heuristic_split(self):
+        """Returns the original circuit if a split of the heuristic has no solution."""
+        circuit = QuantumCircuit(4)
+        for i in range(4):
+            for j in range(i + 1, 4):
+                circuit.cx(i, j)
+        dag = circuit_to_dag(circuit)
+
+        coupling = CouplingMap.from_line(4)
+        mapper = BIPMapping(coupling, objective="depth", num_splits=2, max_swaps_inbetween_layers=1)
+        actual = mapper.run(dag)
+
+        self.assertIs(mapper.found_solution, False)
+        self.assertEqual(circuit_to_dag(circuit), actual)
+
     def test_multi_cregs(self):
         """Test for multiple ClassicalRegisters."""
 
@@ -294,6 +348,18 @@ class TestBIPMapping(QiskitTestCase):
         idle = QuantumRegister(1, name="ancilla")
         self.assertEqual(idle[0], actual._layout.initial_layout[2])
 
+    def test_coupling_map_is_not_modified(self):
+        """Test that the given coupling map is neither reduced nor symmetrized in place."""
+        circuit = QuantumCircuit(3)
+        circuit.cx(0, 1)
+        circuit.cx(1, 2)
+        circuit.cx(0, 2)
+
+        coupling = CouplingMap([(0, 1), (1, 3), (3, 2)])
+        BIPMapping(coupling, qubit_subset=[0, 1, 3])(circuit)
+        self.assertEqual(coupling.size(), 4)
+        self.assertEqual(coupling.get_edges(), [(0, 1), (1, 3), (3, 2)])
+
     def test_unconnected_qubit_subset(self):
         """Fails if qubits in `qubit_subset` are not connected."""
         circuit = QuantumCircuit(3)
@@ -303,6 +369,72 @@ class TestBIPMapping(QiskitTestCase):
         with self.assertRaises(TranspilerError):
             BIPMapping(coupling, qubit_subset=[0, 1, 2])(circuit)
 
+    def test_no_cx_error_rate(self):
+        """Fails if an error-aware objective has neither backend properties nor a cx error rate."""
+        circuit = QuantumCircuit(3)
+        circuit.cx(0, 1)
+        circuit.cx(1, 2)
+        circuit.cx(0, 2)
+
+        coupling = CouplingMap.from_line(3)
+        with self.assertRaises(TranspilerError):
+            BIPMapping(coupling, objective="gate_error", default_cx_error_rate=None)(circuit)
+
+    def test_user_model_modifier_with_heuristic(self):
+        """A user_model_modifier can fix a qubit position through the variable names."""
+        circuit = QuantumCircuit(4)
+        circuit.cx(0, 1)
+        circuit.cx(2, 3)
+        circuit.cx(0, 2)
+        circuit.cx(1, 3)
+        circuit.cx(0, 1)
+        circuit.cx(2, 3)
+        circuit.cx(0, 3)
+        circuit.cx(1, 2)
+
+        def place_q0_at_1(_, mdl):
+            # w_{t}_{q}_{j} == 1 iff virtual qubit q is at physical qubit j at time-step t
+            mdl.add_constraint(mdl.get_var_by_name("w_0_0_1") == 1)
+
+        coupling = CouplingMap.from_line(4)
+        property_set = {}
+        actual = BIPMapping(
+            coupling, objective="depth", num_splits=2, user_model_modifier=place_q0_at_1
+        )(circuit, property_set)
+
+        CheckMap(coupling)(actual, property_set)
+        self.assertTrue(property_set["is_swap_mapped"])
+        self.assertEqual(actual._layout.initial_layout[1], circuit.qubits[0])
+
+    def test_user_model_modifier_finds_constraints(self):
+        """A user_model_modifier can look up constraints by name."""
+        circuit = QuantumCircuit(3)
+        circuit.cx(0, 1)
+        circuit.cx(1, 2)
+        circuit.cx(0, 2)
+
+        found = []
+
+        def find_constraint(_, mdl):
+            found.append(mdl.get_constraint_by_name("assignment_vqubits_0_at_0"))
+
+        coupling = CouplingMap.from_line(3)
+        for num_splits in [1, 2]:
+            with self.subTest(num_splits=num_splits):
+                found.clear()
+                property_set = {}
+                actual = BIPMapping(
+                    coupling,
+                    objective="depth",
+                    num_splits=num_splits,
+                    user_model_modifier=find_constraint,
+                )(circuit, property_set)
+
+                CheckMap(coupling)(actual, property_set)
+                self.assertTrue(property_set["is_swap_mapped"])
+                self.assertTrue(found)
+                self.assertTrue(all(ct is not None for ct in found))
+
     def test_objective_function(self):
         """Test if ``objective`` functions priorities metrics correctly."""
 
@@ -339,3 +471,51 @@ class TestBIPMapping(QiskitTestCase):
         dep_opt = UnitarySynthesis(basis_gates=["cx"])(dep_opt)
         err_opt = UnitarySynthesis(basis_gates=["cx"])(err_opt)
         self.assertGreater(dep_opt.count_ops()["cx"], err_opt.count_ops()["cx"])
+
+    def test_heuristic_with_backend_properties(self):
+        """Test the time-window heuristic with the error-aware objectives and backend properties."""
+        qc = QuantumCircuit(4)
+        qc.dcx(0, 1)
+        qc.cx(2, 3)
+        qc.dcx(0, 2)
+        qc.cx(1, 3)
+        qc.dcx(0, 1)
+        qc.cx(2, 3)
+        qc.cx(0, 3)
+        qc.cx(1, 2)
+        coupling = CouplingMap(FakeLima().configuration().coupling_map)
+        for objective in ["gate_error", "balanced"]:
+            with self.subTest(objective=objective):
+                property_set = {}
+                actual = BIPMapping(
+                    coupling,
+                    objective=objective,
+                    qubit_subset=[0, 1, 3, 4],
+                    backend_prop=FakeLima().properties(),
+                    max_swaps_inbetween_layers=3,
+                    num_splits=2,
+                )(qc, property_set)
+                CheckMap(coupling)(actual, property_set)
+                self.assertTrue(property_set["is_swap_mapped"])
+
+    def test_heuristic_error_objective_is_minimized(self):
+        """Test that every heuristic model minimizes the error-aware objectives."""
+        qc = QuantumCircuit(4)
+        qc.dcx(0, 1)
+        qc.cx(2, 3)
+        qc.dcx(0, 2)
+        qc.cx(1, 3)
+        qc.dcx(0, 1)
+        qc.cx(2, 3)
+        qc.cx(0, 3)
+        qc.cx(1, 2)
+        coupling = CouplingMap(FakeLima().configuration().coupling_map)
+        for objective in ["gate_error", "balanced"]:
+            with self.subTest(objective=objective):
+                model = BIPMappingModel(
+                    circuit_to_dag(qc), coupling, [0, 1, 3, 4], dummy_timesteps=2, num_splits=2
+                )
+                model.create_cpx_problem(objective, backend_prop=FakeLima().properties())
+                self.assertTrue(model.heur_problem)
+                for mdl in [*model.heur_problem, model.problem]:
+                    self.assertTrue(mdl.has_objective())